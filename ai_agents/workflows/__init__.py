@@ -15,6 +15,7 @@ try:
         WorkflowTask,
         TaskStatus,
         TaskPriority,
+        WorkflowValidationError,
         orchestrator,
         create_simple_workflow,
         create_analysis_workflow
@@ -105,6 +106,7 @@ if TRADITIONAL_ORCHESTRATOR_AVAILABLE:
         'WorkflowTask',
         'TaskStatus',
         'TaskPriority',
+        'WorkflowValidationError',
         'orchestrator',
         'create_simple_workflow',
         'create_analysis_workflow'
@@ -19,6 +19,7 @@ import asyncio
 import logging
 import time
 import json
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Callable, Set
 from dataclasses import dataclass, field
@@ -39,6 +40,9 @@ class TaskStatus(Enum):
     CANCELLED = "cancelled"
     RETRYING = "retrying"
 
+class WorkflowValidationError(ValueError):
+    """Raised when a workflow's task dependencies are unknown or circular"""
+
 class TaskPriority(Enum):
     """Task priority levels"""
     LOW = 1
@@ -172,7 +176,9 @@ class WorkflowOrchestrator:
         logger.info(f"Registered processor for agent type: {agent_type}")
     
     def create_workflow(self, definition: WorkflowDefinition) -> str:
-        """Create a new workflow"""
+        """Create a new workflow; raises WorkflowValidationError for invalid or circular dependencies"""
+        self._build_dependency_graph(definition.tasks)
+        
         workflow_id = definition.id
         self.active_workflows[workflow_id] = definition
         self.workflow_status[workflow_id] = {
@@ -258,7 +264,7 @@ class WorkflowOrchestrator:
             # Validate dependencies exist
             invalid_deps = set(task.dependencies) - task_ids
             if invalid_deps:
-                raise ValueError(f"Task {task.id} has invalid dependencies: {invalid_deps}")
+                raise WorkflowValidationError(f"Task {task.id} has invalid dependencies: {invalid_deps}")
             
             graph[task.id] = set(task.dependencies)
         
@@ -268,26 +274,26 @@ class WorkflowOrchestrator:
         return graph
     
     def _check_circular_dependencies(self, graph: Dict[str, Set[str]]):
-        """Check for circular dependencies in the workflow"""
-        def has_cycle(node, visited, rec_stack):
-            visited.add(node)
-            rec_stack.add(node)
-            
-            for neighbor in graph.get(node, set()):
-                if neighbor not in visited:
-                    if has_cycle(neighbor, visited, rec_stack):
-                        return True
-                elif neighbor in rec_stack:
-                    return True
-            
-            rec_stack.remove(node)
-            return False
+        """Check for circular dependencies in the workflow (Kahn's algorithm)"""
+        in_degree = {node: len(deps) for node, deps in graph.items()}
+        dependents = {node: [] for node in graph}
+        for node, deps in graph.items():
+            for dep in deps:
+                dependents[dep].append(node)
+        
+        ready = deque(node for node, degree in in_degree.items() if degree == 0)
+        resolved = 0
+        while ready:
+            node = ready.popleft()
+            resolved += 1
+            for dependent in dependents[node]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    ready.append(dependent)
         
-        visited = set()
-        for node in graph:
-            if node not in visited:
-                if has_cycle(node, visited, set()):
-                    raise ValueError(f"Circular dependency detected in workflow")
+        # Tasks left with unresolved dependencies sit on a cycle
+        if resolved != len(graph):
+            raise WorkflowValidationError(f"Circular dependency detected in workflow")
     
     async def _execute_with_dependencies(self, tasks: List[WorkflowTask], 
                                        dependency_graph: Dict[str, Set[str]],
@@ -460,7 +460,7 @@ def health_check():
     health_data = {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "providers_enabled": len([p for p in providers.values() if p["enabled"]]),
+        "providers_enabled": sum(1 for p in providers.values() if p["enabled"]),
         "env_private_exists": os.path.exists(ENV_PRIVATE_FILE),
         "ai_packages_available": ai_status_data["ai_available"],
         "ai_status": ai_status_data["status_message"],
@@ -2,8 +2,11 @@ import os
 import json
 import time
 import logging
+import functools
+import random
 from datetime import datetime, timedelta
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from openai import OpenAI
 import threading
@@ -71,7 +74,37 @@ print("Info: AI dependency checker temporarily disabled due to circular imports"
 #     print(f"Info: AI workflow orchestrator not available: {e}")
 print("Info: AI workflow orchestrator temporarily disabled due to circular imports")
 
+# orjson is optional; without it responses use Flask's stdlib JSON provider
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that uses orjson when no stdlib options are requested
+
+    sort_keys is honoured. ensure_ascii is not: orjson always emits UTF-8, so
+    non-ASCII text is not escaped.
+    """
+    def dumps(self, obj, **kwargs):
+        # orjson only emits compact output; debug mode asks for indent=2
+        if kwargs.keys() - {"separators"} or kwargs.get("separators", (",", ":")) != (",", ":"):
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        # Decodes request bodies, and response bodies in tests via get_json()
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
 app = Flask(__name__)
+if ORJSON_AVAILABLE:
+    app.json = OrjsonProvider(app)
 CORS(app)
 
 # Configure logging for debugging Ollama issues
@@ -689,22 +722,45 @@ def chat_with_provider(provider_id, message, system_prompt=None, model=None):
 
 # Usage tracking function
 def track_usage(provider_id, response_time, tokens):
-    timestamp = datetime.now().isoformat()
-    date_key = datetime.now().strftime('%Y-%m-%d')
-    
-    if date_key not in usage_stats:
-        usage_stats[date_key] = {}
-    
-    if provider_id not in usage_stats[date_key]:
-        usage_stats[date_key][provider_id] = {
+    # Shares the locked merge with bulk tracking, so concurrent requests never lose
+    # an update or change usage_stats while save_usage is writing it out
+    track_usage_bulk([(provider_id, response_time, tokens)])
+
+# Usage is keyed by local date; the formatted key only changes at midnight
+@functools.lru_cache(maxsize=2)
+def _date_key(day):
+    return day.strftime('%Y-%m-%d')
+
+# Batched usage tracking: entries are (provider_id, response_time, tokens) tuples
+def track_usage_bulk(entries):
+    date_key = _date_key(datetime.now().date())
+    
+    # Total the batch per provider before touching the shared stats
+    totals = {}
+    for provider_id, response_time, tokens in entries:
+        stats = totals.setdefault(provider_id, {
             "requests": 0,
             "tokens": 0,
             "total_response_time": 0
-        }
+        })
+        stats["requests"] += 1
+        stats["tokens"] += tokens
+        stats["total_response_time"] += response_time
+    
+    if not totals:
+        return
     
-    usage_stats[date_key][provider_id]["requests"] += 1
-    usage_stats[date_key][provider_id]["tokens"] += tokens
-    usage_stats[date_key][provider_id]["total_response_time"] += response_time
+    with usage_lock:
+        day_stats = usage_stats.setdefault(date_key, {})
+        for provider_id, batch in totals.items():
+            stats = day_stats.setdefault(provider_id, {
+                "requests": 0,
+                "tokens": 0,
+                "total_response_time": 0
+            })
+            stats["requests"] += batch["requests"]
+            stats["tokens"] += batch["tokens"]
+            stats["total_response_time"] += batch["total_response_time"]
     
     save_usage()
 
@@ -831,6 +887,33 @@ def send_router_command(device, command):
     except Exception as e:
         return False, str(e)
 
+def generate_dummy_config(device_name, device_ip):
+    """Build the simulated running configuration returned for dummy devices"""
+    return """!
+! Last configuration change at 14:32:15 UTC Thu Aug 7 2025
+version 16.12
+service timestamps debug datetime msec
+service timestamps log datetime msec
+!
+hostname {device_name}
+!
+interface GigabitEthernet0/0
+ ip address {device_ip} 255.255.255.0
+!
+interface GigabitEthernet0/1
+ ip address 192.168.2.1 255.255.255.0
+!
+router ospf 1
+ router-id 1.1.1.1
+ network 192.168.1.0 0.0.0.255 area 0
+ network 192.168.2.0 0.0.0.255 area 0
+!
+line vty 0 4
+ login
+ transport input ssh
+!
+end""".format(device_name=device_name, device_ip=device_ip)
+
 # API Endpoints
 @app.route('/api/providers', methods=['GET'])
 def list_providers():
@@ -1564,7 +1647,6 @@ def config_push():
         time.sleep(2)
         
         # For simulation, we'll randomly determine success
-        import random
         success = random.choice([True, False])
         
         status = "Configuration pushed successfully" if success else "Configuration push failed"
@@ -1636,8 +1718,8 @@ def config_push():
         "command_history": command_history,
         "execution_summary": {
             "total_commands": len(command_history),
-            "successful_commands": len([cmd for cmd in command_history if cmd['success']]),
-            "failed_commands": len([cmd for cmd in command_history if not cmd['success']]),
+            "successful_commands": sum(1 for cmd in command_history if cmd['success']),
+            "failed_commands": sum(1 for cmd in command_history if not cmd['success']),
             "execution_time": f"{len(router_commands) * 0.5 + 2}s"
         }
     })
@@ -1688,30 +1770,7 @@ def config_retrieval():
         time.sleep(1.5)
         
         # Return a simulated running configuration
-        config = """!
-! Last configuration change at 14:32:15 UTC Thu Aug 7 2025
-version 16.12
-service timestamps debug datetime msec
-service timestamps log datetime msec
-!
-hostname {device_name}
-!
-interface GigabitEthernet0/0
- ip address {device_ip} 255.255.255.0
-!
-interface GigabitEthernet0/1
- ip address 192.168.2.1 255.255.255.0
-!
-router ospf 1
- router-id 1.1.1.1
- network 192.168.1.0 0.0.0.255 area 0
- network 192.168.2.0 0.0.0.255 area 0
-!
-line vty 0 4
- login
- transport input ssh
-!
-end""".format(device_name=devices[device_id]['name'], device_ip=devices[device_id]['ip'])
+        config = generate_dummy_config(devices[device_id]['name'], devices[device_id]['ip'])
     
     # Generate detailed command history for retrieval workflow
     command_history = []
@@ -1759,8 +1818,8 @@ end""".format(device_name=devices[device_id]['name'], device_ip=devices[device_i
         "command_history": command_history,
         "execution_summary": {
             "total_commands": len(command_history),
-            "successful_commands": len([cmd for cmd in command_history if cmd['success']]),
-            "failed_commands": len([cmd for cmd in command_history if not cmd['success']]),
+            "successful_commands": sum(1 for cmd in command_history if cmd['success']),
+            "failed_commands": sum(1 for cmd in command_history if not cmd['success']),
             "execution_time": "2.5s"
         }
     })
@@ -2192,7 +2251,8 @@ def create_workflow():
         workflows_path = os.path.join(os.path.dirname(__file__), 'ai_agents', 'workflows')
         if workflows_path not in sys.path:
             sys.path.insert(0, workflows_path)
-        from orchestrator import orchestrator, create_simple_workflow, create_analysis_workflow
+        from orchestrator import (orchestrator, create_simple_workflow, create_analysis_workflow,
+                                  WorkflowValidationError)
         
         data = request.json
         workflow_type = data.get('type', 'simple')
@@ -2216,7 +2276,11 @@ def create_workflow():
         else:
             return jsonify({"error": f"Unknown workflow type: {workflow_type}"}), 400
         
-        workflow_id = orchestrator.create_workflow(workflow)
+        try:
+            workflow_id = orchestrator.create_workflow(workflow)
+        except WorkflowValidationError as e:
+            # Unknown or circular task dependencies
+            return jsonify({"error": str(e)}), 400
         
         return jsonify({
             'workflow_id': workflow_id,
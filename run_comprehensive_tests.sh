@@ -169,6 +169,8 @@ run_backend_tests() {
         --tb=short \
         --maxfail=5 \
         --durations=10 \
+        -n auto \
+        --dist loadscope \
         --cov=backend_server \
         --cov-report=html:test-reports/backend/coverage \
         --cov-report=term-missing \
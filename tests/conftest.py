@@ -0,0 +1,157 @@
+"""
+Shared pytest configuration for the test suite.
+
+Tests marked ``slow`` (network-backed checks and long-running scenarios) are
+skipped unless pytest is run with ``--runslow``.
+
+Under pytest-xdist, run the suite with ``--dist loadscope`` so each test class
+(or module) stays on one worker.
+
+The Flask test client is created once per session; test modules reset the
+backend state they rely on in their own function-scoped fixtures. The OpenAI
+client mocks and the frozen ``today`` date key are shared here as well.
+"""
+
+import copy
+import os
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import NonCallableMagicMock, create_autospec, patch
+
+import pytest
+from openai import OpenAI
+from openai.resources import Models
+from openai.resources.chat import Completions
+
+# Make the backend importable from the repository root
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--runslow", action="store_true", default=False,
+        help="run tests marked as slow (network-backed or long-running)"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--runslow"):
+        return
+    skip_slow = pytest.mark.skip(reason="slow test, use --runslow to run it")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
+@pytest.fixture(scope="session")
+def backend_server():
+    """Import the backend module on first use instead of at collection time"""
+    import backend_server as module
+    return module
+
+
+@pytest.fixture(scope="session")
+def _session_client(backend_server):
+    """Create one Flask test client and app context for the whole test run"""
+    app = backend_server.app
+    app.config['TESTING'] = True
+    with app.app_context():
+        # The client is not entered with 'with', so it keeps no request context
+        # between requests and tests may drive it from several threads
+        yield app.test_client()
+
+
+@pytest.fixture
+def client(_session_client):
+    """Test client for the Flask application, shared across the session"""
+    return _session_client
+
+
+def _build_canned_response():
+    """Build the chat completions response returned by the mocked OpenAI client"""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content="Test response from AI"))],
+        usage=SimpleNamespace(total_tokens=42)
+    )
+
+
+# Built once; tests get a shallow copy of the response
+_CANNED_RESPONSE = _build_canned_response()
+
+
+def _build_openai_spec_mock():
+    """Build an OpenAI client mock whose resources are autospecced
+
+    OpenAI.chat and OpenAI.models are cached properties that create_autospec
+    cannot follow, so the resource classes are specced directly.
+    """
+    mock_instance = NonCallableMagicMock(spec=OpenAI)
+    mock_instance.chat.completions = create_autospec(Completions, instance=True)
+    mock_instance.models = create_autospec(Models, instance=True)
+    return mock_instance
+
+
+# Autospec is slow, so the client mock is built once and reset after every test
+_OPENAI_SPEC_MOCK = _build_openai_spec_mock()
+
+
+@pytest.fixture(scope="module")
+def _openai_patch():
+    """Patch backend_server.OpenAI once per module with the autospecced client mock
+
+    The patch stays on from the first test that requests it to the end of the
+    module, so a module that uses it requests mock_openai_client from an
+    autouse fixture and every test sees the same patched class.
+    """
+    with patch('backend_server.OpenAI', return_value=_OPENAI_SPEC_MOCK) as mock_client:
+        yield mock_client
+
+
+@pytest.fixture
+def mock_openai_client(_openai_patch):
+    """Mock OpenAI client for testing"""
+    # Mock chat completions response
+    _OPENAI_SPEC_MOCK.chat.completions.create.return_value = copy.copy(_CANNED_RESPONSE)
+    yield _OPENAI_SPEC_MOCK
+    _openai_patch.reset_mock()
+    _OPENAI_SPEC_MOCK.reset_mock(return_value=True, side_effect=True)
+
+
+def _build_fake_openai_client():
+    """Build a plain-object OpenAI client that always returns the canned response"""
+    return SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: _CANNED_RESPONSE)),
+        models=SimpleNamespace(list=lambda: SimpleNamespace(data=[]))
+    )
+
+
+_FAKE_OPENAI_CLIENT = _build_fake_openai_client()
+
+
+@pytest.fixture
+def fake_openai_client():
+    """OpenAI client for tests that never set side effects or inspect calls
+
+    Tests that need either must use mock_openai_client instead.
+    """
+    with patch('backend_server.OpenAI', return_value=_FAKE_OPENAI_CLIENT):
+        yield _FAKE_OPENAI_CLIENT
+
+
+# Date key returned by the today fixture
+FROZEN_DATE = "2024-01-15"
+
+
+class _FrozenDatetime(datetime):
+    """datetime whose now() always falls on FROZEN_DATE"""
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2024, 1, 15, 12, 0, 0, tzinfo=tz)
+
+
+@pytest.fixture
+def today(monkeypatch, backend_server):
+    """Freeze backend_server's clock and return the usage date key for today"""
+    monkeypatch.setattr(backend_server, "datetime", _FrozenDatetime)
+    return FROZEN_DATE
@@ -28,10 +28,14 @@ import sys
 import asyncio
 import time
 import logging
-from unittest.mock import patch, MagicMock, AsyncMock, mock_open
+from unittest.mock import patch, MagicMock, AsyncMock, NonCallableMagicMock, mock_open
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 import importlib
+import gc
+import tracemalloc
+from contextlib import aclosing, contextmanager
+from dataclasses import dataclass
 
 # Add the parent directory to the path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -89,10 +93,67 @@ except ImportError as e:
     print(f"Dependency Checker not available: {e}")
 
 
+# ============================================================================
+# MOCK RESPONSES
+# ============================================================================
+
+_CROSS_PAGE_OK = {
+    'success': True,
+    'response': 'Cross-page operation completed',
+    'source_page': 'device',
+    'target_page': 'automation',
+    'agents_involved': ['device_agent', 'automation_agent']
+}
+
+_DEVICE_TO_ANALYTICS_OK = {
+    'success': True,
+    'response': 'Device metrics analyzed and report generated',
+    'agents_involved': ['device_agent', 'analytics_agent']
+}
+
+_OPERATIONS_TO_AUTOMATION_OK = {
+    'success': True,
+    'response': 'Monitoring alerts configured with automation rules',
+    'agents_involved': ['operations_agent', 'automation_agent']
+}
+
+_NETWORK_TROUBLESHOOTING_OK = {
+    'success': True,
+    'response': 'Network analysis complete: Router CPU high, recommend automation',
+    'agents_involved': ['device_agent', 'analytics_agent', 'automation_agent']
+}
+
+_CONCURRENT_OK = {'success': True, 'response': 'Concurrent response'}
+
+# Upper bound on traced allocations for ten AIAgentIntegration instances
+MAX_INTEGRATION_MEMORY_GROWTH = 1024 * 1024
+
+# Chunks read from a workflow stream before the test stops consuming it
+MAX_STREAM_CHUNKS = 3
+
+
+# Restrict master agent mocks to the real interface when it can be imported
+_MASTER_AGENT_SPEC = MasterAgent if MASTER_AGENT_AVAILABLE else None
+
+
+def _mock_master_agent(**awaitable_returns: Any) -> NonCallableMagicMock:
+    """Build a master agent mock whose named coroutine methods return the given values"""
+    master_agent = NonCallableMagicMock(spec=_MASTER_AGENT_SPEC)
+    for name, value in awaitable_returns.items():
+        setattr(master_agent, name, AsyncMock(return_value=value))
+    return master_agent
+
+
 # ============================================================================
 # TEST FIXTURES
 # ============================================================================
 
+@pytest.fixture(scope="module")
+def anyio_backend():
+    """Run anyio tests on asyncio only; the agents do not need trio support"""
+    return "asyncio"
+
+
 @pytest.fixture
 def mock_crewai_available():
     """Mock CrewAI as available"""
@@ -109,9 +170,35 @@ def mock_crewai_not_available():
             yield False
 
 
+@pytest.fixture(autouse=True)
+def _fresh_ai_integration(monkeypatch):
+    """Give each test a fresh get_ai_integration() singleton
+
+    Results then do not depend on which tests ran earlier on the same
+    pytest-xdist worker.
+    """
+    if AI_INTEGRATION_AVAILABLE:
+        monkeypatch.setattr(sys.modules['ai_agents.integration'], "ai_integration_instance", None)
+
+
 @pytest.fixture
-def mock_crewai_components():
-    """Mock all CrewAI components"""
+def crewai_enabled(monkeypatch):
+    """Mark CrewAI as available with AI agents enabled in the config"""
+    monkeypatch.setattr(sys.modules['ai_agents.integration'], "CREWAI_AVAILABLE", True)
+    monkeypatch.setattr(AGENTS_CONFIG, "enabled", True)
+
+
+@dataclass(frozen=True)
+class CrewAIMocks:
+    """CrewAI component mocks installed in place of the fallback classes"""
+    agent: MagicMock
+    task: MagicMock
+    crew: MagicMock
+    llm: MagicMock
+
+
+def _build_crewai_mocks() -> CrewAIMocks:
+    """Build a fresh set of CrewAI component mocks"""
     mock_agent = MagicMock()
     mock_agent.role = "Test Agent"
     mock_agent.goal = "Test Goal"
@@ -127,17 +214,44 @@ def mock_crewai_components():
     mock_llm = MagicMock()
     mock_llm.invoke.return_value = "Test LLM response"
     
+    return CrewAIMocks(agent=mock_agent, task=mock_task, crew=mock_crew, llm=mock_llm)
+
+
+@contextmanager
+def _patch_fallback_classes(mocks: CrewAIMocks):
+    """Patch the fallback classes to return the given mocks"""
     # Use fallback patching instead of trying to patch non-existent modules
-    with patch('ai_agents.fallback_classes.FallbackAgent', return_value=mock_agent):
-        with patch('ai_agents.fallback_classes.FallbackTask', return_value=mock_task):
-            with patch('ai_agents.fallback_classes.FallbackCrew', return_value=mock_crew):
-                with patch('ai_agents.fallback_classes.FallbackChatOpenAI', return_value=mock_llm):
-                    yield {
-                        'agent': mock_agent,
-                        'task': mock_task,
-                        'crew': mock_crew,
-                        'llm': mock_llm
-                    }
+    with patch('ai_agents.fallback_classes.FallbackAgent', return_value=mocks.agent), \
+         patch('ai_agents.fallback_classes.FallbackTask', return_value=mocks.task), \
+         patch('ai_agents.fallback_classes.FallbackCrew', return_value=mocks.crew), \
+         patch('ai_agents.fallback_classes.FallbackChatOpenAI', return_value=mocks.llm):
+        yield mocks
+
+
+@pytest.fixture(scope="session")
+def _mock_crewai_template():
+    """Shared CrewAI mocks, built once per session"""
+    return _build_crewai_mocks()
+
+
+@pytest.fixture
+def mock_crewai_components(_mock_crewai_template):
+    """Mock all CrewAI components with the shared session mocks
+
+    Tests must not reconfigure these mocks; use mock_crewai_components_mutable
+    for that. Recorded calls are cleared after each test.
+    """
+    with _patch_fallback_classes(_mock_crewai_template) as mocks:
+        yield mocks
+    for mock in (mocks.agent, mocks.task, mocks.crew, mocks.llm):
+        mock.reset_mock()
+
+
+@pytest.fixture
+def mock_crewai_components_mutable():
+    """Mock all CrewAI components with a private set of mocks a test may reconfigure"""
+    with _patch_fallback_classes(_build_crewai_mocks()) as mocks:
+        yield mocks
 
 
 @pytest.fixture
@@ -285,25 +399,22 @@ class TestAIAgentIntegration:
         assert integration1 is integration2
     
     @pytest.mark.anyio
-    async def test_process_chat_message_success(self, mock_crewai_components):
+    async def test_process_chat_message_success(self, crewai_enabled, mock_crewai_components):
         """Test successful chat message processing"""
-        with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-            with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.process_user_request = AsyncMock(
-                    return_value={'success': True, 'response': 'Test response'}
-                )
-                
-                result = await integration.process_chat_message(
-                    message="Test message",
-                    session_id="test_session",
-                    user_context={"test": True}
-                )
-                
-                assert result['success'] is True
-                assert 'response' in result
-                assert result['ai_generated'] is True
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(
+            process_user_request={'success': True, 'response': 'Test response'}
+        )
+        
+        result = await integration.process_chat_message(
+            message="Test message",
+            session_id="test_session",
+            user_context={"test": True}
+        )
+        
+        assert result['success'] is True
+        assert 'response' in result
+        assert result['ai_generated'] is True
     
     @pytest.mark.anyio
     async def test_process_chat_message_not_ready(self):
@@ -320,98 +431,84 @@ class TestAIAgentIntegration:
                     'missing dependencies' in result['response'])
     
     @pytest.mark.anyio
-    async def test_handle_analytics_request(self, mock_crewai_components):
+    async def test_handle_analytics_request(self, crewai_enabled, mock_crewai_components):
         """Test analytics request handling"""
-        with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-            with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.process_user_request = AsyncMock(
-                    return_value={'success': True, 'response': 'Analytics result'}
-                )
-                
-                result = await integration.handle_analytics_request(
-                    request="Analyze system performance",
-                    context={'metrics': 'cpu,memory'}
-                )
-                
-                assert result['success'] is True
-                assert 'response' in result
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(
+            process_user_request={'success': True, 'response': 'Analytics result'}
+        )
+        
+        result = await integration.handle_analytics_request(
+            request="Analyze system performance",
+            context={'metrics': 'cpu,memory'}
+        )
+        
+        assert result['success'] is True
+        assert 'response' in result
     
     @pytest.mark.anyio
-    async def test_handle_device_request(self, mock_crewai_components):
+    async def test_handle_device_request(self, crewai_enabled, mock_crewai_components):
         """Test device request handling"""
-        with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-            with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.process_user_request = AsyncMock(
-                    return_value={'success': True, 'response': 'Device status'}
-                )
-                
-                result = await integration.handle_device_request(
-                    request="Check router status",
-                    device_context={'device_id': 'router_001'}
-                )
-                
-                assert result['success'] is True
-                assert 'response' in result
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(
+            process_user_request={'success': True, 'response': 'Device status'}
+        )
+        
+        result = await integration.handle_device_request(
+            request="Check router status",
+            device_context={'device_id': 'router_001'}
+        )
+        
+        assert result['success'] is True
+        assert 'response' in result
     
     @pytest.mark.anyio
-    async def test_handle_operations_request(self, mock_crewai_components):
+    async def test_handle_operations_request(self, crewai_enabled, mock_crewai_components):
         """Test operations request handling"""
-        with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-            with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.process_user_request = AsyncMock(
-                    return_value={'success': True, 'response': 'Operations status'}
-                )
-                
-                result = await integration.handle_operations_request(
-                    request="System health check",
-                    ops_context={'check_type': 'full'}
-                )
-                
-                assert result['success'] is True
-                assert 'response' in result
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(
+            process_user_request={'success': True, 'response': 'Operations status'}
+        )
+        
+        result = await integration.handle_operations_request(
+            request="System health check",
+            ops_context={'check_type': 'full'}
+        )
+        
+        assert result['success'] is True
+        assert 'response' in result
     
     @pytest.mark.anyio
-    async def test_handle_automation_request(self, mock_crewai_components):
+    async def test_handle_automation_request(self, crewai_enabled, mock_crewai_components):
         """Test automation request handling"""
-        with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-            with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.process_user_request = AsyncMock(
-                    return_value={'success': True, 'response': 'Automation created'}
-                )
-                
-                result = await integration.handle_automation_request(
-                    request="Create monitoring workflow",
-                    automation_context={'workflow_type': 'monitoring'}
-                )
-                
-                assert result['success'] is True
-                assert 'response' in result
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(
+            process_user_request={'success': True, 'response': 'Automation created'}
+        )
+        
+        result = await integration.handle_automation_request(
+            request="Create monitoring workflow",
+            automation_context={'workflow_type': 'monitoring'}
+        )
+        
+        assert result['success'] is True
+        assert 'response' in result
     
-    def test_get_agent_status(self, mock_crewai_components):
+    def test_get_agent_status(self, crewai_enabled, mock_crewai_components):
         """Test getting agent status"""
-        with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-            with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.get_agent_status.return_value = {
-                    'master_agent': {'status': 'active'},
-                    'specialized_agents': {}
-                }
-                
-                status = integration.get_agent_status()
-                
-                assert status['status'] == 'active'
-                assert 'integration_status' in status
-                assert 'agent_details' in status
-                assert 'capabilities' in status
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent()
+        integration.master_agent.get_agent_status.return_value = {
+            'master_agent': {'status': 'active'},
+            'specialized_agents': {}
+        }
+        
+        status = integration.get_agent_status()
+        
+        assert status['status'] == 'active'
+        assert 'integration_status' in status
+        assert 'agent_details' in status
+        assert 'capabilities' in status
 
 
 # ============================================================================
@@ -431,49 +528,42 @@ class TestCrewAIAvailable:
             assert integration.integration_status['dependencies_installed'] is True
     
     @pytest.mark.anyio
-    async def test_master_agent_creation(self, mock_crewai_available, mock_crewai_components):
+    async def test_master_agent_creation(self, crewai_enabled, mock_crewai_available, mock_crewai_components):
         """Test master agent creation when CrewAI is available"""
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                integration = AIAgentIntegration()
-                
-                # Should create master agent
-                assert integration.master_agent is not None or integration.integration_status['fallback_mode']
+        integration = AIAgentIntegration()
+        
+        # Should create master agent
+        assert integration.master_agent is not None or integration.integration_status['fallback_mode']
     
     @pytest.mark.anyio
-    async def test_full_ai_workflow(self, mock_crewai_available, mock_crewai_components, sample_ai_request):
+    async def test_full_ai_workflow(self, crewai_enabled, mock_crewai_available, mock_crewai_components, sample_ai_request):
         """Test complete AI workflow when CrewAI is available"""
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                result = await process_ai_request("chat", sample_ai_request)
-                
-                # Should get actual AI response, not fallback
-                assert 'success' in result
-                if result.get('success'):
-                    assert 'fallback' not in result or not result['fallback']
+        result = await process_ai_request("chat", sample_ai_request)
+        
+        # Should get actual AI response, not fallback
+        assert 'success' in result
+        if result.get('success'):
+            assert 'fallback' not in result or not result['fallback']
     
     @pytest.mark.anyio
-    async def test_agent_coordination(self, mock_crewai_available, mock_crewai_components):
+    async def test_agent_coordination(self, crewai_enabled, mock_crewai_available, mock_crewai_components):
         """Test multi-agent coordination when CrewAI is available"""
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.process_user_request = AsyncMock(
-                    return_value={
-                        'success': True,
-                        'response': 'Multi-agent response',
-                        'agents_involved': ['chat_agent', 'analytics_agent']
-                    }
-                )
-                
-                result = await integration.process_chat_message(
-                    "Analyze performance and provide insights"
-                )
-                
-                assert result['success'] is True
-                if 'agents_involved' in result:
-                    assert len(result['agents_involved']) > 0
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(
+            process_user_request={
+                'success': True,
+                'response': 'Multi-agent response',
+                'agents_involved': ['chat_agent', 'analytics_agent']
+            }
+        )
+        
+        result = await integration.process_chat_message(
+            "Analyze performance and provide insights"
+        )
+        
+        assert result['success'] is True
+        if 'agents_involved' in result:
+            assert len(result['agents_involved']) > 0
 
 
 # ============================================================================
@@ -583,122 +673,105 @@ class TestAgentTypes:
     """Test individual agent types and their specific functionality"""
     
     @pytest.mark.anyio
-    async def test_chat_agent_functionality(self, mock_crewai_components):
+    async def test_chat_agent_functionality(self, crewai_enabled, mock_crewai_components):
         """Test chat agent specific functionality"""
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.process_user_request = AsyncMock(
-                    return_value={
-                        'success': True,
-                        'response': 'Chat agent response',
-                        'agents_involved': ['chat_agent']
-                    }
-                )
-                
-                result = await integration.process_chat_message("Hello, how are you?")
-                assert result['success'] is True
-                assert 'response' in result
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(
+            process_user_request={
+                'success': True,
+                'response': 'Chat agent response',
+                'agents_involved': ['chat_agent']
+            }
+        )
+        
+        result = await integration.process_chat_message("Hello, how are you?")
+        assert result['success'] is True
+        assert 'response' in result
     
     @pytest.mark.anyio
-    async def test_analytics_agent_functionality(self, mock_crewai_components):
+    async def test_analytics_agent_functionality(self, crewai_enabled, mock_crewai_components):
         """Test analytics agent specific functionality"""
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.process_user_request = AsyncMock(
-                    return_value={
-                        'success': True,
-                        'response': 'Analytics insights: CPU usage 75%',
-                        'agents_involved': ['analytics_agent']
-                    }
-                )
-                
-                result = await integration.handle_analytics_request(
-                    "Analyze system performance metrics"
-                )
-                assert result['success'] is True
-                assert 'Analytics' in result['response'] or 'analytics' in result['response']
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(
+            process_user_request={
+                'success': True,
+                'response': 'Analytics insights: CPU usage 75%',
+                'agents_involved': ['analytics_agent']
+            }
+        )
+        
+        result = await integration.handle_analytics_request(
+            "Analyze system performance metrics"
+        )
+        assert result['success'] is True
+        assert 'Analytics' in result['response'] or 'analytics' in result['response']
     
     @pytest.mark.anyio
-    async def test_device_agent_functionality(self, mock_crewai_components):
+    async def test_device_agent_functionality(self, crewai_enabled, mock_crewai_components):
         """Test device agent specific functionality"""
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.process_user_request = AsyncMock(
-                    return_value={
-                        'success': True,
-                        'response': 'Device status: Router online, 25% CPU',
-                        'agents_involved': ['device_agent']
-                    }
-                )
-                
-                result = await integration.handle_device_request(
-                    "Check router configuration and status"
-                )
-                assert result['success'] is True
-                assert 'Device' in result['response'] or 'device' in result['response'] or 'Router' in result['response']
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(
+            process_user_request={
+                'success': True,
+                'response': 'Device status: Router online, 25% CPU',
+                'agents_involved': ['device_agent']
+            }
+        )
+        
+        result = await integration.handle_device_request(
+            "Check router configuration and status"
+        )
+        assert result['success'] is True
+        assert 'Device' in result['response'] or 'device' in result['response'] or 'Router' in result['response']
     
     @pytest.mark.anyio
-    async def test_operations_agent_functionality(self, mock_crewai_components):
+    async def test_operations_agent_functionality(self, crewai_enabled, mock_crewai_components):
         """Test operations agent specific functionality"""
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.process_user_request = AsyncMock(
-                    return_value={
-                        'success': True,
-                        'response': 'System operational: All services running',
-                        'agents_involved': ['operations_agent']
-                    }
-                )
-                
-                result = await integration.handle_operations_request(
-                    "Perform system health check"
-                )
-                assert result['success'] is True
-                assert 'operational' in result['response'] or 'operations' in result['response']
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(
+            process_user_request={
+                'success': True,
+                'response': 'System operational: All services running',
+                'agents_involved': ['operations_agent']
+            }
+        )
+        
+        result = await integration.handle_operations_request(
+            "Perform system health check"
+        )
+        assert result['success'] is True
+        assert 'operational' in result['response'] or 'operations' in result['response']
     
     @pytest.mark.anyio
-    async def test_automation_agent_functionality(self, mock_crewai_components):
+    async def test_automation_agent_functionality(self, crewai_enabled, mock_crewai_components):
         """Test automation agent specific functionality"""
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.process_user_request = AsyncMock(
-                    return_value={
-                        'success': True,
-                        'response': 'Automation workflow created for monitoring',
-                        'agents_involved': ['automation_agent']
-                    }
-                )
-                
-                result = await integration.handle_automation_request(
-                    "Create automated backup workflow"
-                )
-                assert result['success'] is True
-                assert 'automation' in result['response'] or 'workflow' in result['response']
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(
+            process_user_request={
+                'success': True,
+                'response': 'Automation workflow created for monitoring',
+                'agents_involved': ['automation_agent']
+            }
+        )
+        
+        result = await integration.handle_automation_request(
+            "Create automated backup workflow"
+        )
+        assert result['success'] is True
+        assert 'automation' in result['response'] or 'workflow' in result['response']
     
     @pytest.mark.anyio
-    async def test_agent_error_handling(self, mock_crewai_components):
+    async def test_agent_error_handling(self, crewai_enabled, mock_crewai_components):
         """Test agent error handling"""
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.process_user_request = AsyncMock(
-                    side_effect=Exception("Test error")
-                )
-                
-                result = await integration.process_chat_message("Test message")
-                assert result['success'] is False
-                assert 'error' in result or 'Error' in result['response']
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent()
+        integration.master_agent.process_user_request = AsyncMock(
+            side_effect=Exception("Test error")
+        )
+        
+        result = await integration.process_chat_message("Test message")
+        assert result['success'] is False
+        assert 'error' in result or 'Error' in result['response']
 
 
 # ============================================================================
@@ -710,77 +783,48 @@ class TestCrossPageRequests:
     """Test cross-page request handling and coordination"""
     
     @pytest.mark.anyio
-    async def test_cross_page_request_handling(self, mock_crewai_components, sample_cross_page_request):
+    async def test_cross_page_request_handling(self, crewai_enabled, mock_crewai_components, sample_cross_page_request):
         """Test handling requests that span multiple pages"""
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.handle_cross_page_request = AsyncMock(
-                    return_value={
-                        'success': True,
-                        'response': 'Cross-page operation completed',
-                        'source_page': 'device',
-                        'target_page': 'automation',
-                        'agents_involved': ['device_agent', 'automation_agent']
-                    }
-                )
-                
-                result = await integration.handle_cross_page_request(
-                    request=sample_cross_page_request['message'],
-                    source_page=sample_cross_page_request['source_page'],
-                    target_page=sample_cross_page_request['target_page'],
-                    context=sample_cross_page_request['context']
-                )
-                
-                assert result['success'] is True
-                assert 'cross-page' in result['response'] or 'Cross-page' in result['response']
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(handle_cross_page_request=_CROSS_PAGE_OK)
+        
+        result = await integration.handle_cross_page_request(
+            request=sample_cross_page_request['message'],
+            source_page=sample_cross_page_request['source_page'],
+            target_page=sample_cross_page_request['target_page'],
+            context=sample_cross_page_request['context']
+        )
+        
+        assert result['success'] is True
+        assert 'cross-page' in result['response'] or 'Cross-page' in result['response']
     
     @pytest.mark.anyio
-    async def test_device_to_analytics_cross_page(self, mock_crewai_components):
+    async def test_device_to_analytics_cross_page(self, crewai_enabled, mock_crewai_components):
         """Test device to analytics cross-page request"""
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.handle_cross_page_request = AsyncMock(
-                    return_value={
-                        'success': True,
-                        'response': 'Device metrics analyzed and report generated',
-                        'agents_involved': ['device_agent', 'analytics_agent']
-                    }
-                )
-                
-                result = await integration.handle_cross_page_request(
-                    request="Collect device metrics and create performance report",
-                    source_page="device",
-                    target_page="analytics"
-                )
-                
-                assert result['success'] is True
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(handle_cross_page_request=_DEVICE_TO_ANALYTICS_OK)
+        
+        result = await integration.handle_cross_page_request(
+            request="Collect device metrics and create performance report",
+            source_page="device",
+            target_page="analytics"
+        )
+        
+        assert result['success'] is True
     
     @pytest.mark.anyio
-    async def test_operations_to_automation_cross_page(self, mock_crewai_components):
+    async def test_operations_to_automation_cross_page(self, crewai_enabled, mock_crewai_components):
         """Test operations to automation cross-page request"""
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.handle_cross_page_request = AsyncMock(
-                    return_value={
-                        'success': True,
-                        'response': 'Monitoring alerts configured with automation rules',
-                        'agents_involved': ['operations_agent', 'automation_agent']
-                    }
-                )
-                
-                result = await integration.handle_cross_page_request(
-                    request="Set up automated alerts for system monitoring",
-                    source_page="operations",
-                    target_page="automation"
-                )
-                
-                assert result['success'] is True
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(handle_cross_page_request=_OPERATIONS_TO_AUTOMATION_OK)
+        
+        result = await integration.handle_cross_page_request(
+            request="Set up automated alerts for system monitoring",
+            source_page="operations",
+            target_page="automation"
+        )
+        
+        assert result['success'] is True
     
     @pytest.mark.anyio
     async def test_cross_page_fallback_behavior(self, mock_crewai_not_available):
@@ -832,12 +876,17 @@ class TestLangGraphWorkflow:
     async def test_stream_graph_workflow(self, mock_langgraph_components):
         """Test streaming graph workflow execution"""
         chunks = []
-        async for chunk in stream_with_graph(
+        stream = stream_with_graph(
             request="Test streaming workflow",
             context={"stream_test": True},
             request_type="hybrid"
-        ):
-            chunks.append(chunk)
+        )
+        async with aclosing(stream):
+            async for chunk in stream:
+                chunks.append(chunk)
+                # A few chunks are enough to check the stream shape
+                if len(chunks) >= MAX_STREAM_CHUNKS:
+                    break
         
         assert len(chunks) > 0
         # Should have status updates
@@ -859,27 +908,24 @@ class TestLangGraphWorkflow:
             assert 'success' in result or 'error' in result
     
     @pytest.mark.anyio
-    async def test_graph_workflow_with_master_agent_integration(self, mock_crewai_components, mock_langgraph_components):
+    async def test_graph_workflow_with_master_agent_integration(self, crewai_enabled, mock_crewai_components, mock_langgraph_components):
         """Test graph workflow integration with master agent"""
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent._process_with_graph_orchestration = AsyncMock(
-                    return_value={
-                        'success': True,
-                        'response': 'Graph orchestrated response',
-                        'orchestration_mode': 'langgraph'
-                    }
-                )
-                
-                # Test master agent using graph orchestration
-                result = await integration.master_agent._process_with_graph_orchestration(
-                    "Test request", {"test": True}, "chat"
-                )
-                
-                assert result['success'] is True
-                assert result['orchestration_mode'] == 'langgraph'
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(
+            _process_with_graph_orchestration={
+                'success': True,
+                'response': 'Graph orchestrated response',
+                'orchestration_mode': 'langgraph'
+            }
+        )
+        
+        # Test master agent using graph orchestration
+        result = await integration.master_agent._process_with_graph_orchestration(
+            "Test request", {"test": True}, "chat"
+        )
+        
+        assert result['success'] is True
+        assert result['orchestration_mode'] == 'langgraph'
     
     @pytest.mark.anyio
     async def test_graph_workflow_error_handling(self, mock_langgraph_components):
@@ -997,90 +1043,64 @@ class TestFallbackBehavior:
 class TestRealisticScenarios:
     """Test realistic usage scenarios combining multiple features"""
     
-    @pytest.mark.anyio
-    async def test_network_troubleshooting_scenario(self, mock_crewai_components):
-        """Test realistic network troubleshooting scenario"""
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.process_user_request = AsyncMock(
-                    return_value={
-                        'success': True,
-                        'response': 'Network analysis complete: Router CPU high, recommend automation',
-                        'agents_involved': ['device_agent', 'analytics_agent', 'automation_agent']
-                    }
-                )
-                
-                # Simulate network troubleshooting workflow
-                result = await integration.process_chat_message(
-                    "My network seems slow. Can you check device performance and suggest automation to prevent future issues?",
-                    session_id="network_trouble_123",
-                    user_context={'network_segment': '192.168.1.0/24'}
-                )
-                
-                assert result['success'] is True
-                assert 'agents_involved' in result
+    pytestmark = pytest.mark.slow
+    
+    @pytest.fixture
+    def integration(self, crewai_enabled, mock_crewai_components):
+        """AI integration with a master agent whose requests are stubbed per test"""
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(process_user_request=None)
+        return integration
     
     @pytest.mark.anyio
-    async def test_system_monitoring_setup_scenario(self, mock_crewai_components):
-        """Test system monitoring setup scenario"""
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                
-                # Sequence of requests for monitoring setup
-                requests = [
-                    ("Check current system status", "operations"),
-                    ("Analyze performance trends", "analytics"),
-                    ("Create monitoring workflow", "automation")
-                ]
-                
-                results = []
-                for request, req_type in requests:
-                    integration.master_agent.process_user_request = AsyncMock(
-                        return_value={
-                            'success': True,
-                            'response': f'{req_type} completed: {request}',
-                            'agents_involved': [f'{req_type}_agent']
-                        }
-                    )
-                    
-                    if req_type == "operations":
-                        result = await integration.handle_operations_request(request)
-                    elif req_type == "analytics":
-                        result = await integration.handle_analytics_request(request)
-                    elif req_type == "automation":
-                        result = await integration.handle_automation_request(request)
-                    
-                    results.append(result)
-                
-                # All requests should succeed
-                assert all(r['success'] for r in results)
+    @pytest.mark.parametrize("handler, request_text, agent_response", [
+        (
+            "process_chat_message",
+            "My network seems slow. Can you check device performance and suggest automation to prevent future issues?",
+            _NETWORK_TROUBLESHOOTING_OK
+        ),
+        # System monitoring setup sequence
+        (
+            "handle_operations_request",
+            "Check current system status",
+            {'success': True, 'response': 'operations completed', 'agents_involved': ['operations_agent']}
+        ),
+        (
+            "handle_analytics_request",
+            "Analyze performance trends",
+            {'success': True, 'response': 'analytics completed', 'agents_involved': ['analytics_agent']}
+        ),
+        (
+            "handle_automation_request",
+            "Create monitoring workflow",
+            {'success': True, 'response': 'automation completed', 'agents_involved': ['automation_agent']}
+        ),
+    ], ids=["network_troubleshooting", "monitoring_operations", "monitoring_analytics", "monitoring_automation"])
+    async def test_scenario(self, integration, handler, request_text, agent_response):
+        """Test realistic requests are routed through the master agent"""
+        integration.master_agent.process_user_request.return_value = agent_response
+        
+        result = await getattr(integration, handler)(request_text)
+        
+        assert result['success'] is True
+        assert result['agents_involved'] == agent_response['agents_involved']
     
     @pytest.mark.anyio
-    async def test_performance_under_load(self, mock_crewai_components):
+    async def test_performance_under_load(self, crewai_enabled, mock_crewai_components):
         """Test performance under multiple concurrent requests"""
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.process_user_request = AsyncMock(
-                    return_value={'success': True, 'response': 'Concurrent response'}
-                )
-                
-                # Create multiple concurrent requests
-                tasks = []
-                for i in range(5):
-                    task = integration.process_chat_message(f"Concurrent request {i}")
-                    tasks.append(task)
-                
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                # Should handle concurrent requests
-                successful_results = [r for r in results if not isinstance(r, Exception) and r.get('success')]
-                assert len(successful_results) > 0
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(process_user_request=_CONCURRENT_OK)
+        
+        # Create multiple concurrent requests; any exception fails the group
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(integration.process_chat_message(f"Concurrent request {i}"))
+                for i in range(5)
+            ]
+        
+        # Should handle concurrent requests
+        results = [task.result() for task in tasks]
+        assert all(result.get('success') for result in results)
     
     def test_configuration_validation(self):
         """Test configuration validation and error handling"""
@@ -1113,77 +1133,77 @@ class TestRealisticScenarios:
 # PERFORMANCE AND STRESS TESTS
 # ============================================================================
 
+@pytest.mark.skipif(not AI_INTEGRATION_AVAILABLE, reason="AI Integration not available")
 class TestPerformanceAndStress:
     """Performance and stress tests for AI agent system"""
     
+    pytestmark = pytest.mark.slow
+    
     @pytest.mark.anyio
-    async def test_response_time_monitoring(self, mock_crewai_components):
+    async def test_response_time_monitoring(self, crewai_enabled, mock_crewai_components):
         """Test that responses come within reasonable time"""
-        if not AI_INTEGRATION_AVAILABLE:
-            pytest.skip("AI Integration not available")
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent(
+            process_user_request={'success': True, 'response': 'Quick response'}
+        )
         
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                integration.master_agent.process_user_request = AsyncMock(
-                    return_value={'success': True, 'response': 'Quick response'}
-                )
-                
-                start_time = time.time()
-                result = await integration.process_chat_message("Quick test")
-                end_time = time.time()
-                
-                response_time = end_time - start_time
-                
-                # Response should be reasonably fast (< 5 seconds for mocked calls)
-                assert response_time < 5.0
-                assert result['success'] is True
+        start_time = time.time()
+        result = await integration.process_chat_message("Quick test")
+        end_time = time.time()
+        
+        response_time = end_time - start_time
+        
+        # Response should be reasonably fast (< 5 seconds for mocked calls)
+        assert response_time < 5.0
+        assert result['success'] is True
     
     def test_memory_usage_stability(self):
         """Test that memory usage remains stable"""
-        if not AI_INTEGRATION_AVAILABLE:
-            pytest.skip("AI Integration not available")
+        # Warm up once so import-time and first-instance caches are not counted
+        AIAgentIntegration()
         
-        # Create multiple integrations to test memory stability
-        integrations = []
-        for i in range(10):
-            try:
-                integration = AIAgentIntegration()
-                integrations.append(integration)
-            except Exception:
-                # Handle case where creation fails due to missing dependencies
-                pass
+        gc.collect()
+        tracemalloc.start()
+        try:
+            snapshot_before = tracemalloc.take_snapshot()
+            
+            # Hold references so every instance is included in the diff
+            integrations = [AIAgentIntegration() for _ in range(10)]
+            
+            gc.collect()
+            snapshot_after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        
+        stats = snapshot_after.compare_to(snapshot_before, 'lineno')
+        total_growth = sum(stat.size_diff for stat in stats)
         
-        # Should be able to create multiple instances without issues
-        assert len(integrations) >= 0  # At least doesn't crash
+        assert len(integrations) == 10
+        assert total_growth < MAX_INTEGRATION_MEMORY_GROWTH, (
+            f"10 integrations grew memory by {total_growth} bytes: {stats[:5]}"
+        )
     
     @pytest.mark.anyio
-    async def test_error_recovery(self, mock_crewai_components):
+    async def test_error_recovery(self, crewai_enabled, mock_crewai_components):
         """Test system recovery from errors"""
-        if not AI_INTEGRATION_AVAILABLE:
-            pytest.skip("AI Integration not available")
+        integration = AIAgentIntegration()
+        integration.master_agent = _mock_master_agent()
         
-        with patch('ai_agents.integration.CREWAI_AVAILABLE', True):
-            with patch('ai_agents.configs.agents_config.AGENTS_CONFIG.enabled', True):
-                integration = AIAgentIntegration()
-                integration.master_agent = MagicMock()
-                
-                # First request fails
-                integration.master_agent.process_user_request = AsyncMock(
-                    side_effect=Exception("Temporary failure")
-                )
-                
-                result1 = await integration.process_chat_message("First request")
-                assert result1['success'] is False
-                
-                # Second request succeeds (system recovers)
-                integration.master_agent.process_user_request = AsyncMock(
-                    return_value={'success': True, 'response': 'Recovery successful'}
-                )
-                
-                result2 = await integration.process_chat_message("Second request")
-                assert result2['success'] is True
+        # First request fails
+        integration.master_agent.process_user_request = AsyncMock(
+            side_effect=Exception("Temporary failure")
+        )
+        
+        result1 = await integration.process_chat_message("First request")
+        assert result1['success'] is False
+        
+        # Second request succeeds (system recovers)
+        integration.master_agent.process_user_request = AsyncMock(
+            return_value={'success': True, 'response': 'Recovery successful'}
+        )
+        
+        result2 = await integration.process_chat_message("Second request")
+        assert result2['success'] is True
 
 
 # ============================================================================
@@ -1193,21 +1213,17 @@ class TestPerformanceAndStress:
 class TestUtilities:
     """Test utility functions and helper methods"""
     
+    @pytest.mark.skipif(not AI_INTEGRATION_AVAILABLE, reason="AI Integration not available")
     def test_ai_status_reporting(self):
         """Test AI status reporting functionality"""
-        if not AI_INTEGRATION_AVAILABLE:
-            pytest.skip("AI Integration not available")
-        
         status = get_ai_status()
         assert isinstance(status, dict)
         assert 'status' in status or 'error' in status
     
+    @pytest.mark.skipif(not AI_INTEGRATION_AVAILABLE, reason="AI Integration not available")
     @pytest.mark.anyio
     async def test_request_processing_helper(self, sample_ai_request):
         """Test request processing helper function"""
-        if not AI_INTEGRATION_AVAILABLE:
-            pytest.skip("AI Integration not available")
-        
         result = await process_ai_request("chat", sample_ai_request)
         assert isinstance(result, dict)
         assert 'success' in result or 'error' in result
@@ -0,0 +1,105 @@
+"""
+Backend JSON Decode Benchmarks
+==============================
+pytest-benchmark timings for decoding a captured config-retrieval response with
+the stdlib json module, orjson and a pydantic model. They back the choice of JSON
+library in the backend and its tests with numbers. Usage tracking and the /api/chat
+path, with a mocked provider, are timed as well.
+
+Skipped unless pytest-benchmark is installed and --runslow is given:
+    pytest tests/test_backend_bench.py --runslow --benchmark-only
+
+Save a baseline with --benchmark-autosave, then fail on regressions with e.g.
+    --benchmark-compare --benchmark-compare-fail=mean:5%
+"""
+
+import json
+
+import pytest
+from pydantic import BaseModel
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.slow
+
+
+class ConfigRetrievalResponse(BaseModel):
+    """Shape of a /api/workflows/config-retrieval response"""
+    device: str
+    config: str
+
+
+@pytest.fixture(scope="module")
+def body(_session_client, backend_server):
+    """Raw body of one dummy-router config retrieval, captured once"""
+    devices = {
+        "dummy_router": {
+            "name": "Dummy Router",
+            "ip": "192.168.1.1",
+            "model": "Cisco 2900",
+            "username": "",
+            "password": "",
+            "port": 22,
+            "status": "unknown",
+            "last_checked": ""
+        }
+    }
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(backend_server, "devices", devices)
+        response = _session_client.post('/api/workflows/config-retrieval',
+                                        json={"device_id": "dummy_router"})
+    assert response.status_code == 200
+    return response.data
+
+
+def test_stdlib_json(benchmark, body):
+    """Decode with the stdlib json module"""
+    assert benchmark(json.loads, body)["device"] == "dummy_router"
+
+
+def test_orjson(benchmark, body):
+    """Decode with orjson"""
+    orjson = pytest.importorskip("orjson")
+    assert benchmark(orjson.loads, body)["device"] == "dummy_router"
+
+
+def test_pydantic(benchmark, body):
+    """Decode and validate with a pydantic model"""
+    assert benchmark(ConfigRetrievalResponse.model_validate_json, body).device == "dummy_router"
+
+
+# Enabled provider that the fake OpenAI client answers for
+_BENCH_PROVIDER = {
+    "name": "Bench Provider",
+    "enabled": True,
+    "api_key": "bench_key",
+    "model": "bench-model",
+    "base_url": "http://bench.provider.com/v1",
+    "status": "connected",
+    "last_checked": ""
+}
+
+_CHAT_BODY = json.dumps({"message": "Benchmark message", "provider": "bench_provider"}).encode()
+
+
+@pytest.fixture
+def usage_sandbox(monkeypatch, tmp_path, backend_server):
+    """Start from empty usage stats and write the usage file under tmp_path"""
+    monkeypatch.setattr(backend_server, "USAGE_FILE", str(tmp_path / "usage.json"))
+    monkeypatch.setattr(backend_server, "usage_stats", {})
+
+
+@pytest.mark.usefixtures("usage_sandbox")
+def test_track_usage(benchmark, backend_server):
+    """Record one request in the usage stats"""
+    benchmark(backend_server.track_usage, "bench_provider", 1.0, 100)
+    assert backend_server.usage_stats
+
+
+@pytest.mark.usefixtures("usage_sandbox", "fake_openai_client")
+def test_chat_endpoint(benchmark, _session_client, backend_server, monkeypatch):
+    """Serve one /api/chat request through the mocked provider"""
+    monkeypatch.setitem(backend_server.providers, "bench_provider", dict(_BENCH_PROVIDER))
+    response = benchmark(_session_client.post, '/api/chat',
+                         data=_CHAT_BODY, content_type='application/json')
+    assert response.status_code == 200